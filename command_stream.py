@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+AURA Platform - Streaming Command Runner
+Runs shell commands and yields parsed records (lines or JSON values) while
+the command is still running, so large CLI outputs never sit in memory whole
+"""
+
+import os
+import json
+import signal
+import threading
+import subprocess
+from collections import deque
+
+
+class CommandStream:
+    """Iterate over the output of a shell command record by record.
+
+    parse="lines" yields stripped, non-empty lines. parse="json" yields each
+    element of a top-level JSON array (e.g. `--format=json`), or each value
+    of concatenated non-array JSON. parse="ndjson" yields one JSON value per
+    line. Records are read from the pipe only as fast as they are consumed,
+    so a slow consumer makes the command block instead of buffering its
+    output. After iteration, `returncode`, `parse_error` and `ok` report how
+    the command went.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    # Largest single JSON record we are prepared to buffer
+    MAX_RECORD_CHARS = 8 * 1024 * 1024
+    STDERR_LINES = 20
+
+    def __init__(self, cmd, parse="lines", verbose=False):
+        if parse not in ("lines", "json", "ndjson"):
+            raise ValueError(f"Unknown parse mode: {parse}")
+        self.cmd = cmd
+        self.parse = parse
+        self.verbose = verbose
+        self.returncode = None
+        self.parse_error = None
+        self.stderr_tail = deque(maxlen=self.STDERR_LINES)
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and self.parse_error is None
+
+    def _drain_stderr(self, stream):
+        # Keep only the tail so a chatty command cannot grow memory
+        for line in stream:
+            self.stderr_tail.append(line.rstrip("\n"))
+
+    def _iter_lines(self, stdout):
+        for line in stdout:
+            line = line.strip()
+            if line:
+                yield line
+
+    def _iter_ndjson(self, stdout):
+        decoder = json.JSONDecoder()
+        while True:
+            line = stdout.readline(self.MAX_RECORD_CHARS + 1)
+            if not line:
+                return
+            if len(line) > self.MAX_RECORD_CHARS:
+                self.parse_error = f"record longer than {self.MAX_RECORD_CHARS} characters"
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                value, end = decoder.raw_decode(line)
+            except json.JSONDecodeError as e:
+                self.parse_error = f"invalid JSON line: {e}"
+                return
+            if end != len(line):
+                self.parse_error = "unexpected data after JSON value on a line"
+                return
+            yield value
+
+    def _iter_json(self, stdout):
+        decoder = json.JSONDecoder()
+        buffer = ""
+        eof = False
+        in_array = None  # decided by the first non-blank character
+        while True:
+            buffer = buffer.lstrip()
+            if in_array is None and buffer:
+                in_array = buffer.startswith("[")
+                if in_array:
+                    buffer = buffer[1:].lstrip()
+            if in_array and buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if in_array and buffer.startswith("]"):
+                # End of the top-level array: let the command finish normally
+                while stdout.read(self.CHUNK_SIZE):
+                    pass
+                return
+            if buffer:
+                try:
+                    value, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    value, end = None, -1
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end != -1 and (end < len(buffer) or eof):
+                    yield value
+                    buffer = buffer[end:]
+                    continue
+                if len(buffer) > self.MAX_RECORD_CHARS:
+                    self.parse_error = (f"no JSON value in the first "
+                                        f"{self.MAX_RECORD_CHARS} characters")
+                    return
+            if eof:
+                if buffer or in_array:
+                    self.parse_error = "truncated or invalid JSON output"
+                return
+            chunk = stdout.read(self.CHUNK_SIZE)
+            if chunk:
+                buffer += chunk
+            else:
+                eof = True
+
+    def __iter__(self):
+        if self.verbose:
+            print(f"🔧 Running: {self.cmd}")
+        # Own process group, so stopping the command also stops its children
+        process = subprocess.Popen(self.cmd, shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True,
+                                   start_new_session=True)
+        stderr_thread = threading.Thread(target=self._drain_stderr,
+                                         args=(process.stderr,), daemon=True)
+        stderr_thread.start()
+
+        records = {"lines": self._iter_lines, "json": self._iter_json,
+                   "ndjson": self._iter_ndjson}[self.parse]
+        read_to_end = False
+        try:
+            yield from records(process.stdout)
+            # Parsers stop early on a parse error; otherwise stdout hit EOF
+            read_to_end = self.parse_error is None
+        finally:
+            # Consumer stopped early or output was unparseable: don't leave
+            # the command running. After EOF just wait - gcloud and gsutil
+            # often keep working after their last line of output.
+            if not read_to_end and process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            process.stdout.close()
+            self.returncode = process.wait()
+            stderr_thread.join()
+            process.stderr.close()
+
+        if self.parse_error is not None:
+            print(f"❌ Could not parse output of: {self.cmd}")
+            print(f"Error: {self.parse_error}")
+        elif self.returncode != 0:
+            print(f"❌ Command failed with exit status {self.returncode}: {self.cmd}")
+            for line in self.stderr_tail:
+                print(f"Error: {line}")
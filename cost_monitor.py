@@ -9,6 +9,8 @@ import json
 import sys
 from datetime import datetime, timedelta
 
+from command_stream import CommandStream
+
 class CostMonitor:
     def __init__(self):
         self.project_id = None
@@ -54,40 +56,45 @@ class CostMonitor:
         
         # Get App Engine services
         services_cmd = "gcloud app services list --format='value(id)'"
-        services = self.run_command(services_cmd)
+        services = CommandStream(services_cmd)
+        service_count = 0
         
-        if services:
-            service_list = services.split('\n')
-            print(f"🚀 Active services: {', '.join(service_list)}")
+        for service in services:
+            service_count += 1
+            print(f"🚀 Service: {service}")
             
-            for service in service_list:
-                # Get versions for each service
-                versions_cmd = f"gcloud app versions list --service={service} --format='value(id,traffic_split)'"
-                versions = self.run_command(versions_cmd)
-                if versions:
-                    print(f"  📦 {service} versions: {versions}")
-        else:
+            # Stream versions for each service
+            versions_cmd = f"gcloud app versions list --service={service} --format=json"
+            for version in CommandStream(versions_cmd, parse="json"):
+                if not isinstance(version, dict):
+                    continue
+                traffic = version.get("traffic_split", 0)
+                print(f"  📦 {version.get('id')}: traffic {traffic}")
+        
+        if not services.ok:
+            print("⚠️ Could not list App Engine services")
+        elif not service_count:
             print("❌ No App Engine services found")
     
     def get_storage_usage(self):
         """Get Cloud Storage usage"""
         print("💾 Checking Cloud Storage usage...")
         
-        # List buckets
+        # Stream buckets and size each one as it is listed
         buckets_cmd = "gsutil ls -p " + self.project_id
-        buckets = self.run_command(buckets_cmd)
-        
-        if buckets:
-            bucket_list = buckets.split('\n')
-            print(f"🪣 Storage buckets: {len(bucket_list)}")
-            
-            for bucket in bucket_list:
-                if bucket.strip():
-                    # Get bucket size
-                    size_cmd = f"gsutil du -s {bucket.strip()}"
-                    size = self.run_command(size_cmd)
-                    if size:
-                        print(f"  📁 {bucket}: {size}")
+        buckets = CommandStream(buckets_cmd)
+        bucket_count = 0
+        
+        for bucket in buckets:
+            bucket_count += 1
+            size_cmd = f"gsutil du -s {bucket}"
+            for size in CommandStream(size_cmd):
+                print(f"  📁 {bucket}: {size}")
+        
+        if not buckets.ok:
+            print("⚠️ Could not list storage buckets")
+        elif bucket_count:
+            print(f"🪣 Storage buckets: {bucket_count}")
         else:
             print("📦 No storage buckets found")
     
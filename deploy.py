@@ -5,20 +5,295 @@ Deploys both Node.js backend and Go MCP service to App Engine
 """
 
 import os
+import re
 import sys
+import shutil
+import hashlib
+import argparse
+import fnmatch
 import subprocess
 import json
 import time
 from pathlib import Path
 
+from command_stream import CommandStream
+
+
+def format_size(num_bytes):
+    """Format a byte count as a human readable string"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+class UploadStager:
+    """Pre-deploy stage: computes the exact set of files gcloud would upload
+    for a service, reports it, and stages a minimal hard-linked deploy
+    directory backed by a local content-addressed store of uploaded blobs"""
+
+    LARGE_FILE_BYTES = 1024 * 1024
+    # OS/editor junk that is never needed at runtime - dropped from the stage
+    JUNK_PATTERNS = [".DS_Store", "Thumbs.db", "desktop.ini", "*.swp", "*~"]
+    # Files that are probably not needed at runtime - flagged, but still uploaded
+    SUSPECT_PATTERNS = ["*.log", "*.map", ".env", ".env.*", "test-*", "*.test.js",
+                        "*.spec.js", "fix-*"]
+    # What gcloud ignores when a service has no .gcloudignore of its own
+    DEFAULT_IGNORES = [".gcloudignore", ".git", ".gitignore", "node_modules/"]
+
+    def __init__(self, cache_dir=".deploy_cache"):
+        self.cache_dir = Path(cache_dir).resolve()
+        self.blob_dir = self.cache_dir / "blobs"
+        self.manifest_dir = self.cache_dir / "manifests"
+        self.stage_root = self.cache_dir / "stage"
+
+    # --- .gcloudignore handling -------------------------------------------
+
+    def _pattern_to_regex(self, pattern):
+        """Translate a .gitignore-style pattern into a compiled regex"""
+        anchored = "/" in pattern.rstrip("/")
+        pattern = pattern.strip("/")
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+            elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+                regex += "(?:/.*)?"
+                i += 3
+            elif pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+            elif pattern[i] == "*":
+                regex += "[^/]*"
+                i += 1
+            elif pattern[i] == "\\" and i + 1 < len(pattern):
+                # Backslash escapes the next character, e.g. \# or \*
+                regex += re.escape(pattern[i + 1])
+                i += 2
+            elif pattern[i] == "?":
+                regex += "[^/]"
+                i += 1
+            elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+                end = pattern.index("]", i + 1)
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end + 1
+            else:
+                regex += re.escape(pattern[i])
+                i += 1
+        prefix = "" if anchored else "(?:.*/)?"
+        return re.compile(f"^{prefix}{regex}$")
+
+    def load_ignore_rules(self, service_dir):
+        """Parse a service's .gcloudignore (including #!include directives)"""
+        service_dir = Path(service_dir)
+        ignore_file = service_dir / ".gcloudignore"
+        if ignore_file.exists():
+            lines = ignore_file.read_text().splitlines()
+        else:
+            lines = list(self.DEFAULT_IGNORES)
+            # gcloud's generated default also pulls in an existing .gitignore
+            if (service_dir / ".gitignore").exists():
+                lines.append("#!include:.gitignore")
+
+        # Included lines take the place of their directive, as in gcloud,
+        # so that later rules in the main file still override them
+        expanded = []
+        for line in lines:
+            if line.startswith("#!include:"):
+                included = service_dir / line[len("#!include:"):].strip()
+                if included.exists():
+                    expanded.extend(included.read_text().splitlines())
+            else:
+                expanded.append(line)
+
+        rules = []
+        for line in expanded:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith(("\\#", "\\!")):
+                # Escaped leading # or ! is a literal character, not syntax
+                line = line[1:]
+            dir_only = line.endswith("/")
+            rules.append((self._pattern_to_regex(line), negate, dir_only))
+        return rules
+
+    def is_ignored(self, rules, rel_path, is_dir):
+        """Apply ignore rules to a path; the last matching rule wins"""
+        ignored = False
+        for regex, negate, dir_only in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+    def _matches_any(self, rel_path, patterns):
+        name = rel_path.rsplit("/", 1)[-1]
+        return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+    # --- Planning -----------------------------------------------------------
+
+    def hash_file(self, path):
+        """SHA-256 digest of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def blob_path(self, sha256):
+        return self.blob_dir / sha256[:2] / sha256[2:]
+
+    def plan(self, service, service_dir):
+        """Compute the upload set for a service and compare it with the store"""
+        service_dir = Path(service_dir).resolve()
+        rules = self.load_ignore_rules(service_dir)
+        files, junk, flagged = {}, [], []
+
+        for root, dirs, names in os.walk(service_dir):
+            rel_root = Path(root).relative_to(service_dir).as_posix()
+            rel_root = "" if rel_root == "." else rel_root + "/"
+            kept_dirs = []
+            for d in sorted(dirs):
+                if self.is_ignored(rules, rel_root + d, True):
+                    continue
+                if os.path.islink(os.path.join(root, d)):
+                    # os.walk does not follow these; say so instead of dropping them quietly
+                    flagged.append((rel_root + d, 0, "symlinked directory - not uploaded"))
+                    continue
+                kept_dirs.append(d)
+            dirs[:] = kept_dirs
+            for name in sorted(names):
+                rel_path = rel_root + name
+                # The stage gets its own .gcloudignore - never upload the source's
+                if rel_path == ".gcloudignore" or self.is_ignored(rules, rel_path, False):
+                    continue
+                full_path = service_dir / rel_path
+                if not full_path.exists():
+                    flagged.append((rel_path, 0, "broken symlink - not uploaded"))
+                    continue
+                size = full_path.stat().st_size
+                if self._matches_any(rel_path, self.JUNK_PATTERNS):
+                    junk.append((rel_path, size))
+                    continue
+                if size >= self.LARGE_FILE_BYTES:
+                    flagged.append((rel_path, size, "large file"))
+                elif self._matches_any(rel_path, self.SUSPECT_PATTERNS):
+                    flagged.append((rel_path, size, "probably not needed at runtime"))
+                files[rel_path] = {"sha256": self.hash_file(full_path), "size": size}
+
+        previous = self.load_manifest(service)
+        new_blobs = {f["sha256"]: f["size"] for f in files.values()
+                     if not self.blob_path(f["sha256"]).exists()}
+        return {
+            "service": service,
+            "source": str(service_dir),
+            "files": files,
+            "junk": junk,
+            "flagged": flagged,
+            "added": sorted(set(files) - set(previous)),
+            "removed": sorted(set(previous) - set(files)),
+            "modified": sorted(p for p in set(files) & set(previous)
+                               if files[p]["sha256"] != previous[p]["sha256"]),
+            "changed_bytes": sum(new_blobs.values()),
+        }
+
+    def report(self, plan):
+        """Print the upload set broken down by directory, plus flagged files"""
+        files = plan["files"]
+        total = sum(f["size"] for f in files.values())
+        print(f"📦 Upload set for '{plan['service']}': {len(files)} files, {format_size(total)}")
+
+        by_dir = {}
+        for rel_path, info in files.items():
+            top = rel_path.split("/", 1)[0] if "/" in rel_path else "."
+            count, size = by_dir.get(top, (0, 0))
+            by_dir[top] = (count + 1, size + info["size"])
+        for top, (count, size) in sorted(by_dir.items(), key=lambda item: -item[1][1]):
+            print(f"  📁 {top:<30} {count:>5} files  {format_size(size):>10}")
+
+        if plan["junk"]:
+            print("🧹 Excluded from stage (not needed at runtime):")
+            for rel_path, size in plan["junk"]:
+                print(f"  🗑️ {rel_path} ({format_size(size)})")
+        if plan["flagged"]:
+            print("⚠️ Review these files (add them to .gcloudignore if not needed):")
+            for rel_path, size, reason in plan["flagged"]:
+                print(f"  ⚠️ {rel_path} ({format_size(size)}) - {reason}")
+
+        print(f"🔁 Since last deploy: {len(plan['added'])} added, "
+              f"{len(plan['modified'])} modified, {len(plan['removed'])} removed")
+        print(f"📤 Bytes not already in the artifact cache: "
+              f"{format_size(plan['changed_bytes'])} of {format_size(total)}")
+
+    # --- Staging and the content-addressed store ----------------------------
+
+    def _link_or_copy(self, src, dst):
+        """Hard link src to dst, falling back to a copy across filesystems"""
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    def stage(self, plan):
+        """Build a minimal deploy directory of hard links to the upload set"""
+        stage_dir = self.stage_root / plan["service"]
+        if stage_dir.exists():
+            shutil.rmtree(stage_dir)
+        stage_dir.mkdir(parents=True)
+
+        source = Path(plan["source"])
+        for rel_path in plan["files"]:
+            target = stage_dir / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._link_or_copy(source / rel_path, target)
+
+        # The stage is already filtered - make gcloud upload it as-is.
+        # Unlink first so a write can never go through a hard link.
+        ignore_file = stage_dir / ".gcloudignore"
+        ignore_file.unlink(missing_ok=True)
+        ignore_file.write_text(".gcloudignore\n")
+        return stage_dir
+
+    def load_manifest(self, service):
+        manifest_path = self.manifest_dir / f"{service}.json"
+        if manifest_path.exists():
+            return json.loads(manifest_path.read_text())
+        return {}
+
+    def commit(self, plan):
+        """Record a successful upload: store new blobs and save the manifest"""
+        source = Path(plan["source"])
+        for rel_path, info in plan["files"].items():
+            blob = self.blob_path(info["sha256"])
+            if blob.exists():
+                continue
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # Copy rather than link: the source file may later be edited in place
+            tmp_path = blob.with_suffix(".tmp")
+            shutil.copyfile(source / rel_path, tmp_path)
+            os.replace(tmp_path, blob)
+
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.manifest_dir / f"{plan['service']}.json"
+        manifest_path.write_text(json.dumps(plan["files"], indent=2, sort_keys=True))
+
 class AuraDeployment:
     def __init__(self):
         self.project_id = None
         self.region = "us-central1"
         self.services = {
             "default": "./aura-platform",
-            "fi-mcp": "./fi-mcp-dev"
+            "fi-mcp": "./fi-mcp-dev",
+            "fi-mcp-proxy": "./fi-mcp-proxy"
         }
+        self.stager = UploadStager()
     
     def run_command(self, cmd, check=True, capture_output=False):
         """Run shell command with error handling"""
@@ -69,15 +344,13 @@ class AuraDeployment:
         print("🏗️ Setting up GCP project...")
         
         # List existing projects
-        try:
-            projects = self.run_command("gcloud projects list --format='value(projectId)'", 
-                                      capture_output=True)
-            if projects:
+        projects = CommandStream("gcloud projects list --format='value(projectId)'", verbose=True)
+        for i, project in enumerate(projects, 1):
+            if i == 1:
                 print("📋 Existing projects:")
-                for i, project in enumerate(projects.split('\n'), 1):
-                    print(f"  {i}. {project}")
-        except:
-            pass
+            print(f"  {i}. {project}")
+        if not projects.ok:
+            print("⚠️ Could not list existing projects")
         
         # Get project ID from user
         self.project_id = input("\n📝 Enter your GCP Project ID (or create new): ").strip()
@@ -141,26 +414,56 @@ class AuraDeployment:
             content = content.replace("your-project-id", self.project_id)
             content = content.replace("FI_MCP_URL: https://fi-mcp-dot-your-project-id.appspot.com", 
                                     f"FI_MCP_URL: https://fi-mcp-dot-{self.project_id}.appspot.com")
+            # Route the main service's MCP calls through this project's caching proxy
+            content = re.sub(r"FI_MCP_STREAM_URL: .*",
+                             f"FI_MCP_STREAM_URL: https://fi-mcp-proxy-dot-{self.project_id}.appspot.com/mcp/stream",
+                             content)
             app_yaml_path.write_text(content)
             print("  ✅ Updated aura-platform/app.yaml")
+
+        # Point the caching proxy at the Fi MCP service
+        proxy_yaml_path = Path("fi-mcp-proxy/app.yaml")
+        if proxy_yaml_path.exists():
+            content = proxy_yaml_path.read_text()
+            content = re.sub(r"FI_MCP_UPSTREAM: .*",
+                             f"FI_MCP_UPSTREAM: https://fi-mcp-dot-{self.project_id}.appspot.com",
+                             content)
+            proxy_yaml_path.write_text(content)
+            print("  ✅ Updated fi-mcp-proxy/app.yaml")
     
+    def stage_service(self, service):
+        """Compute, report and stage the upload set for a service"""
+        plan = self.stager.plan(service, self.services[service])
+        self.stager.report(plan)
+        return plan, self.stager.stage(plan)
+
+    def pre_deploy_report(self):
+        """Report the upload set of every service without deploying"""
+        print("🔍 Computing upload sets...")
+        for service in self.services:
+            if not Path(self.services[service]).exists():
+                print(f"⚠️ Skipping '{service}': {self.services[service]} not found")
+                continue
+            self.stage_service(service)
+            print()
+
     def deploy_services(self):
         """Deploy both services to App Engine"""
         print("🚀 Deploying services...")
-        
-        # Deploy Fi MCP service first (dependency)
-        print("📦 Deploying Fi MCP service...")
-        os.chdir("fi-mcp-dev")
-        self.run_command("gcloud app deploy app.yaml --quiet")
-        os.chdir("..")
-        print("✅ Fi MCP service deployed")
-        
-        # Deploy main service
-        print("📦 Deploying main AURA service...")
-        os.chdir("aura-platform")
-        self.run_command("gcloud app deploy app.yaml --quiet")
-        os.chdir("..")
-        print("✅ Main service deployed")
+        root = os.getcwd()
+
+        # Deploy Fi MCP service first, then its caching proxy (dependencies)
+        for service, label, done_label in (
+                ("fi-mcp", "Fi MCP service", "Fi MCP service"),
+                ("fi-mcp-proxy", "Fi MCP caching proxy", "Fi MCP caching proxy"),
+                ("default", "main AURA service", "Main service")):
+            print(f"📦 Deploying {label}...")
+            plan, stage_dir = self.stage_service(service)
+            os.chdir(stage_dir)
+            self.run_command("gcloud app deploy app.yaml --quiet")
+            os.chdir(root)
+            self.stager.commit(plan)
+            print(f"✅ {done_label} deployed")
         
         # Deploy dispatch rules
         print("📦 Deploying dispatch rules...")
@@ -173,10 +476,12 @@ class AuraDeployment:
         
         main_url = f"https://{self.project_id}.appspot.com"
         fi_mcp_url = f"https://fi-mcp-dot-{self.project_id}.appspot.com"
+        fi_mcp_proxy_url = f"https://fi-mcp-proxy-dot-{self.project_id}.appspot.com"
         
         return {
             "main": main_url,
-            "fi_mcp": fi_mcp_url
+            "fi_mcp": fi_mcp_url,
+            "fi_mcp_proxy": fi_mcp_proxy_url
         }
     
     def create_example_requests(self, urls):
@@ -204,6 +509,9 @@ curl -X POST "{urls['main']}/api/chat" \\
 ### Test Fi MCP health:
 curl -X GET "{urls['fi_mcp']}/health"
 
+### Fi MCP caching proxy metrics (hit rate, latency):
+curl -X GET "{urls['fi_mcp_proxy']}/proxy/metrics"
+
 ### Fetch net worth:
 curl -X POST "{urls['main']}/api/fi-mcp/fetch-net-worth" \\
   -H "Content-Type: application/json" \\
@@ -259,6 +567,7 @@ curl -X POST "{urls['main']}/api/fi-mcp/fetch-bank-transactions" \\
             print("=" * 60)
             print(f"🌐 Main Application: {urls['main']}")
             print(f"🔧 Fi MCP Service: {urls['fi_mcp']}")
+            print(f"⚡ Fi MCP Proxy: {urls['fi_mcp_proxy']}")
             print(f"📊 Dashboard: {urls['main']}/dashboard.html")
             print("\n📝 Check deployment_guide.md for API examples")
             print("💰 Monitor costs at: https://console.cloud.google.com/billing")
@@ -271,5 +580,13 @@ curl -X POST "{urls['main']}/api/fi-mcp/fetch-bank-transactions" \\
             sys.exit(1)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deploy AURA Platform to App Engine")
+    parser.add_argument("--plan", action="store_true",
+                        help="only report and stage the upload sets, do not deploy")
+    args = parser.parse_args()
+
     deployer = AuraDeployment()
-    deployer.deploy() 
\ No newline at end of file
+    if args.plan:
+        deployer.pre_deploy_report()
+    else:
+        deployer.deploy() 
\ No newline at end of file
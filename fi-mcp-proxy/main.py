@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+AURA Platform - Fi MCP Caching Proxy
+Caching, request-coalescing reverse proxy in front of the Fi MCP service.
+
+JSON-RPC `tools/call` requests are cached per session, tool and arguments
+with a TTL, and concurrent identical calls share a single upstream request.
+Everything else (tools/list, login pages, ...) is passed through unchanged.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TTL = float(os.environ.get("FI_MCP_PROXY_TTL", "30"))
+
+# Per-tool TTLs in seconds; 0 disables caching for a tool
+TOOL_TTLS = {
+    "fetch_net_worth": 60,
+    "fetch_credit_report": 300,
+    "fetch_epf_details": 300,
+    "fetch_bank_transactions": 30,
+    "fetch_mf_transactions": 30,
+    "fetch_stock_transactions": 30,
+}
+
+# Hop-by-hop headers must not be forwarded by a proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+# Not forwarded upstream: the proxy must be able to read response bodies
+# to decide what to cache and to rewrite JSON-RPC ids
+UPSTREAM_DROPPED_HEADERS = HOP_BY_HOP_HEADERS | {"accept-encoding"}
+
+
+class UpstreamResponse:
+    """Status, headers and body of a response from the Fi MCP backend"""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ProxyMetrics:
+    """Thread-safe hit-rate and latency counters"""
+
+    def __init__(self, max_samples=1000):
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.passthrough = 0
+        self.upstream_errors = 0
+        self.upstream_latencies = []
+        self.request_latencies = []
+
+    def incr(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record(self, samples, seconds):
+        with self.lock:
+            samples.append(seconds)
+            if len(samples) > self.max_samples:
+                del samples[0]
+
+    def record_upstream(self, seconds):
+        self._record(self.upstream_latencies, seconds)
+
+    def record_request(self, seconds):
+        self._record(self.request_latencies, seconds)
+
+    def _summary(self, samples):
+        if not samples:
+            return {"count": 0}
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        }
+
+    def snapshot(self):
+        with self.lock:
+            served = self.hits + self.coalesced
+            lookups = served + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "passthrough": self.passthrough,
+                "upstream_errors": self.upstream_errors,
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+                "upstream_latency": self._summary(self.upstream_latencies),
+                "request_latency": self._summary(self.request_latencies),
+            }
+
+
+class _InFlight:
+    """A pending upstream call that identical concurrent requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class ToolCallCache:
+    """TTL + LRU cache of tool call responses with in-flight request coalescing"""
+
+    def __init__(self, max_entries=1000):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+
+    def ttl_for(self, tool):
+        return TOOL_TTLS.get(tool, DEFAULT_TTL)
+
+    def _get_locked(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return response
+
+    def get(self, key):
+        """Return a fresh cached response, or None"""
+        with self.lock:
+            return self._get_locked(key)
+
+    def put(self, key, response, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def fetch(self, key, ttl, loader, metrics):
+        """Return (response, source) for key, calling loader at most once
+        for all concurrent requests; source is 'hit', 'coalesced' or 'miss'"""
+        cached = self.get(key)
+        if cached is not None:
+            metrics.incr("hits")
+            return cached, "hit"
+
+        with self.lock:
+            # A leader may have filled the cache since the check above
+            cached = self._get_locked(key)
+            if cached is None:
+                pending = self.in_flight.get(key)
+                leader = pending is None
+                if leader:
+                    pending = self.in_flight[key] = _InFlight()
+
+        if cached is not None:
+            metrics.incr("hits")
+            return cached, "hit"
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            metrics.incr("coalesced")
+            return pending.response, "coalesced"
+
+        metrics.incr("misses")
+        try:
+            response, cacheable = loader()
+            if cacheable and ttl > 0:
+                self.put(key, response, ttl)
+            pending.response = response
+            return response, "miss"
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            pending.done.set()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Hand 3xx responses back to the client instead of following them"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class FiMCPProxy:
+    """Forwards requests to the Fi MCP backend, caching tool calls"""
+
+    def __init__(self, upstream, timeout=15, max_entries=1000):
+        self.upstream = upstream.rstrip("/")
+        self.timeout = timeout
+        self.cache = ToolCallCache(max_entries)
+        self.metrics = ProxyMetrics()
+        # Login and mock web page flows rely on redirects reaching the client
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def forward(self, method, path, headers, body):
+        """Send a request to the backend and return an UpstreamResponse"""
+        forward_headers = {k: v for k, v in headers.items()
+                           if k.lower() not in UPSTREAM_DROPPED_HEADERS}
+        request = urllib.request.Request(self.upstream + path, data=body,
+                                         headers=forward_headers, method=method)
+        start = time.monotonic()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                result = UpstreamResponse(response.status, list(response.getheaders()),
+                                          response.read())
+        except urllib.error.HTTPError as e:
+            # Error statuses and unfollowed redirects are passed on as-is
+            result = UpstreamResponse(e.code, list(e.headers.items()), e.read())
+        except (urllib.error.URLError, OSError):
+            self.metrics.incr("upstream_errors")
+            raise
+        finally:
+            self.metrics.record_upstream(time.monotonic() - start)
+        return result
+
+    def cache_key(self, session_id, payload):
+        """Cache key for a cacheable JSON-RPC request, or None"""
+        if not isinstance(payload, dict) or payload.get("method") != "tools/call":
+            return None
+        params = payload.get("params")
+        if not isinstance(params, dict):
+            return None
+        tool = params.get("name")
+        if not isinstance(tool, str) or not tool or not session_id:
+            return None
+        arguments = json.dumps(params.get("arguments") or {}, sort_keys=True,
+                               separators=(",", ":"))
+        return (session_id, tool, arguments)
+
+    def handle(self, method, path, headers, body):
+        """Serve one proxied request, returning an UpstreamResponse"""
+        payload = None
+        if method == "POST" and body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                pass
+
+        session_id = headers.get("Mcp-Session-Id")
+        key = self.cache_key(session_id, payload) if payload is not None else None
+        if key is None:
+            self.metrics.incr("passthrough")
+            return self.forward(method, path, headers, body)
+
+        def load():
+            response = self.forward(method, path, headers, body)
+            return response, response.status == 200 and self._is_success(response.body)
+
+        response, _ = self.cache.fetch((path,) + key, self.cache.ttl_for(key[1]),
+                                       load, self.metrics)
+        return self._with_request_id(response, payload.get("id"))
+
+    def _is_success(self, body):
+        """Only successful JSON-RPC results are cached - never errors, tool
+        failures (`isError`) or login prompts returned as a result"""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return False
+        if not isinstance(data, dict) or "error" in data:
+            return False
+        result = data.get("result")
+        if not isinstance(result, dict) or result.get("isError"):
+            return False
+        content = result.get("content")
+        for item in content if isinstance(content, list) else []:
+            if isinstance(item, dict) and "login_required" in str(item.get("text", "")):
+                return False
+        return True
+
+    def _with_request_id(self, response, request_id):
+        """Shared responses carry the id of whichever request loaded them"""
+        try:
+            data = json.loads(response.body)
+        except ValueError:
+            return response
+        if not isinstance(data, dict) or data.get("id") == request_id:
+            return response
+        data["id"] = request_id
+        return UpstreamResponse(response.status, response.headers,
+                                json.dumps(data).encode())
+
+
+def make_handler(proxy):
+    """Build a request handler class bound to a FiMCPProxy"""
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, headers, body):
+            self.send_response(status)
+            for name, value in headers:
+                if name.lower() not in HOP_BY_HOP_HEADERS:
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json_response(self, status, data):
+            return UpstreamResponse(status, [("Content-Type", "application/json")],
+                                    json.dumps(data).encode())
+
+        def _send_json(self, status, data):
+            response = self._json_response(status, data)
+            self._send(response.status, response.headers, response.body)
+
+        def _proxy(self):
+            start = time.monotonic()
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            try:
+                response = proxy.handle(self.command, self.path, self.headers, body)
+            except (OSError, urllib.error.URLError) as e:
+                response = self._json_response(502, {"error": f"Fi MCP backend unavailable: {e}"})
+            except Exception as e:
+                print(f"❌ Proxy error: {e}")
+                response = self._json_response(500, {"error": f"Fi MCP proxy error: {e}"})
+            try:
+                self._send(response.status, response.headers, response.body)
+            except OSError:
+                # Client went away; there is nobody left to answer
+                self.close_connection = True
+            finally:
+                proxy.metrics.record_request(time.monotonic() - start)
+
+        def do_GET(self):
+            if self.path == "/proxy/health":
+                self._send_json(200, {"status": "ok", "upstream": proxy.upstream})
+            elif self.path == "/proxy/metrics":
+                self._send_json(200, proxy.metrics.snapshot())
+            else:
+                self._proxy()
+
+        do_POST = _proxy
+        do_PUT = _proxy
+        do_DELETE = _proxy
+
+        def log_message(self, format, *args):
+            pass
+
+    return ProxyHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caching proxy for the Fi MCP service")
+    parser.add_argument("--upstream", default=os.environ.get("FI_MCP_UPSTREAM", "http://localhost:8081"),
+                        help="base URL of the Fi MCP backend")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    parser.add_argument("--max-entries", type=int, default=1000)
+    args = parser.parse_args()
+
+    proxy = FiMCPProxy(args.upstream, max_entries=args.max_entries)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(proxy))
+    print(f"🚀 Fi MCP proxy listening on :{args.port} -> {proxy.upstream}")
+    print(f"📊 Metrics: http://localhost:{args.port}/proxy/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Proxy stopped")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
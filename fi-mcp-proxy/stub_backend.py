@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+AURA Platform - Fi MCP Stub Backend
+Minimal local stand-in for the Fi MCP service, used to exercise the caching
+proxy without a real backend. Tool calls answer after a configurable delay
+and every call is counted, so cache hits and coalescing are easy to observe.
+
+    python3 stub_backend.py --port 8081 --delay 0.5
+    python3 main.py --upstream http://localhost:8081 --port 8080
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOOLS = [
+    {"name": "fetch_net_worth", "description": "Net worth summary"},
+    {"name": "fetch_bank_transactions", "description": "Bank transactions"},
+    {"name": "fetch_mf_transactions", "description": "Mutual fund transactions"},
+    {"name": "fetch_stock_transactions", "description": "Stock transactions"},
+    {"name": "fetch_credit_report", "description": "Credit report"},
+    {"name": "fetch_epf_details", "description": "EPF details"},
+]
+
+
+def make_handler(delay, call_counts, lock):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, data):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stub/calls":
+                with lock:
+                    self._send_json(200, dict(call_counts))
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            session_id = self.headers.get("Mcp-Session-Id")
+            response = {"jsonrpc": "2.0", "id": request.get("id")}
+
+            if not session_id:
+                response["error"] = {"code": -32000, "message": "Invalid session ID",
+                                     "data": {"login_url": "/mockWebPage"}}
+            elif request.get("method") == "tools/list":
+                response["result"] = {"tools": TOOLS}
+            elif request.get("method") == "tools/call":
+                params = request.get("params")
+                tool = params.get("name") if isinstance(params, dict) else None
+                tool = tool if isinstance(tool, str) else repr(tool)
+                with lock:
+                    call_counts[tool] = call_counts.get(tool, 0) + 1
+                time.sleep(delay)
+                response["result"] = {"content": [{"type": "text", "text": json.dumps(
+                    {"tool": tool, "session": session_id, "generated_at": time.time()})}]}
+            else:
+                response["error"] = {"code": -32601, "message": "Method not found"}
+
+            self._send_json(200, response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Fi MCP backend")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay", type=float, default=0.5,
+                        help="seconds each tool call takes")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(args.delay, {}, threading.Lock()))
+    print(f"🧪 Stub Fi MCP backend on :{args.port} (tool delay {args.delay}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Fi MCP caching proxy tests - run the stub backend and the proxy in-process
+on free ports and check caching, coalescing and id rewriting end to end.
+
+    python3 -m pytest fi-mcp-proxy/test_proxy.py
+"""
+
+import os
+import sys
+import json
+import threading
+import unittest
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main
+import stub_backend
+
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class FiMCPProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend, backend_url = start_server(
+            stub_backend.make_handler(0.3, {}, threading.Lock()))
+        self.proxy = main.FiMCPProxy(backend_url)
+        self.server, self.url = start_server(main.make_handler(self.proxy))
+        self.backend_url = backend_url
+
+    def tearDown(self):
+        for server in (self.server, self.backend):
+            server.shutdown()
+            server.server_close()
+
+    def post(self, payload, session_id="session-1"):
+        headers = {"Content-Type": "application/json"}
+        if session_id:
+            headers["Mcp-Session-Id"] = session_id
+        request = urllib.request.Request(f"{self.url}/mcp/stream",
+                                         data=json.dumps(payload).encode(), headers=headers)
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def call_tool(self, tool, request_id=1, session_id="session-1"):
+        return self.post({"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                          "params": {"name": tool, "arguments": {}}}, session_id)
+
+    def get_json(self, url):
+        with urllib.request.urlopen(url) as response:
+            return json.loads(response.read())
+
+    def upstream_calls(self):
+        return self.get_json(f"{self.backend_url}/stub/calls")
+
+    def metrics(self):
+        return self.get_json(f"{self.url}/proxy/metrics")
+
+    def test_concurrent_calls_are_coalesced_with_own_ids(self):
+        results = {}
+
+        def worker(request_id):
+            results[request_id] = self.call_tool("fetch_net_worth", request_id)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.upstream_calls(), {"fetch_net_worth": 1})
+        for request_id, response in results.items():
+            self.assertEqual(response["id"], request_id)
+            self.assertIn("result", response)
+        metrics = self.metrics()
+        self.assertEqual(metrics["misses"], 1)
+        self.assertEqual(metrics["hits"] + metrics["coalesced"], 4)
+
+    def test_cached_per_session_and_tool(self):
+        self.call_tool("fetch_net_worth", 1)
+        self.assertEqual(self.call_tool("fetch_net_worth", 2)["id"], 2)
+        self.call_tool("fetch_net_worth", 3, session_id="session-2")
+        self.call_tool("fetch_epf_details", 4)
+
+        self.assertEqual(self.upstream_calls(),
+                         {"fetch_net_worth": 2, "fetch_epf_details": 1})
+        self.assertEqual(self.metrics()["hits"], 1)
+
+    def test_errors_are_not_cached(self):
+        for request_id in (1, 2):
+            response = self.call_tool("fetch_net_worth", request_id, session_id=None)
+            self.assertEqual(response["error"]["message"], "Invalid session ID")
+        # Without a session nothing is cacheable; both calls reach the backend
+        self.assertEqual(self.metrics()["passthrough"], 2)
+
+        stub_calls = {}
+        proxy = self.proxy
+
+        def failing_load():
+            stub_calls["count"] = stub_calls.get("count", 0) + 1
+            body = json.dumps({"jsonrpc": "2.0", "id": 1, "error": {"message": "boom"}})
+            return main.UpstreamResponse(200, [], body.encode()), False
+
+        for _ in range(2):
+            proxy.cache.fetch(("k",), 60, failing_load, proxy.metrics)
+        self.assertEqual(stub_calls["count"], 2)
+
+    def test_tool_failures_and_login_prompts_are_not_cached(self):
+        login_prompt = json.dumps({"status": "login_required",
+                                   "login_url": "/mockWebPage?sessionId=session-1"})
+        results = {
+            "fetch_net_worth": {"isError": True,
+                                "content": [{"type": "text", "text": "tool failed"}]},
+            "fetch_epf_details": {"content": [{"type": "text", "text": login_prompt}]},
+        }
+        upstream_calls = {}
+
+        def fake_forward(method, path, headers, body):
+            tool = json.loads(body)["params"]["name"]
+            upstream_calls[tool] = upstream_calls.get(tool, 0) + 1
+            data = {"jsonrpc": "2.0", "id": 1, "result": results[tool]}
+            return main.UpstreamResponse(200, [], json.dumps(data).encode())
+
+        self.proxy.forward = fake_forward
+        headers = {"Mcp-Session-Id": "session-1"}
+        for tool in results:
+            body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                               "params": {"name": tool}}).encode()
+            for _ in range(2):
+                self.proxy.handle("POST", "/mcp/stream", headers, body)
+
+        self.assertEqual(upstream_calls, {"fetch_net_worth": 2, "fetch_epf_details": 2})
+
+    def test_redirects_reach_the_client(self):
+        class RedirectHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.send_response(302)
+                self.send_header("Location", "/done")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        backend, backend_url = start_server(RedirectHandler)
+        try:
+            response = main.FiMCPProxy(backend_url).forward("POST", "/login", {}, b"phone=1")
+        finally:
+            backend.shutdown()
+            backend.server_close()
+
+        self.assertEqual(response.status, 302)
+        self.assertIn(("Location", "/done"), response.headers)
+
+    def test_malformed_params_are_passed_through(self):
+        for params in ([1], {"name": {"nested": True}}):
+            response = self.post({"jsonrpc": "2.0", "id": 7, "method": "tools/call",
+                                  "params": params})
+            self.assertEqual(response["id"], 7)
+        self.assertEqual(self.metrics()["passthrough"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()